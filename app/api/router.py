@@ -1,14 +1,18 @@
 """
 Router principal para la API de la aplicación de monitoreo de criptomonedas.
 """
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
 
-from app.config import settings
+from app.config import get_redis, settings
 from app.models.crypto import CryptoTick, PriceAlert, PriceSubscription, StatisticsModel
 from app.services.coingecko_client import CoinGeckoClient
 from app.services.price_monitor import PriceMonitor, get_price_monitor
@@ -19,13 +23,32 @@ logger = logging.getLogger(__name__)
 # Crear router con prefijo definido en la configuración
 router = APIRouter(prefix=settings.API_PREFIX)
 
+# Adaptadores compilados una sola vez para validar/volcar respuestas en bloque
+_TICKS_TA = TypeAdapter(Dict[str, CryptoTick])
+_STATS_TA = TypeAdapter(Dict[str, StatisticsModel])
+
+
+# Caché de la respuesta de /health: los balanceadores la consultan con
+# mucha frecuencia y el timestamp solo necesita precisión de segundos
+_hc_cache = {"t": 0.0, "v": None}
+
 
 @router.get("/health")
 async def health_check():
     """
     Endpoint para verificar que la API está funcionando.
+
+    La respuesta se cachea durante ~1 segundo para evitar construir el
+    timestamp ISO en cada ping del balanceador de carga.
     """
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+    now = time.time()
+    if now - _hc_cache["t"] > 1.0:
+        _hc_cache["v"] = {
+            "status": "ok",
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+        }
+        _hc_cache["t"] = now
+    return _hc_cache["v"]
 
 
 @router.get("/coins", response_model=List[str])
@@ -36,20 +59,39 @@ async def list_monitored_coins():
     return settings.crypto_id_list
 
 
-@router.get("/prices", response_model=Dict[str, CryptoTick])
+@router.get("/prices")
 async def get_current_prices():
     """
     Devuelve los precios actuales de todas las criptomonedas monitoreadas.
+
+    Lee primero la caché compartida de Redis (poblada por el monitor), de modo
+    que cualquier worker puede responder aunque su monitor local esté frío.
     """
+    coin_ids = settings.crypto_id_list
+
+    try:
+        redis = get_redis()
+        cached = await redis.mget([f"tick:{coin_id}" for coin_id in coin_ids])
+        ticks = {
+            coin_id: orjson.loads(raw)
+            for coin_id, raw in zip(coin_ids, cached)
+            if raw is not None
+        }
+        if ticks:
+            return ORJSONResponse(ticks)
+    except Exception:
+        # Redis no disponible: usamos el estado en memoria de este worker
+        logger.debug("Redis no disponible, usando ticks en memoria")
+
     price_monitor = get_price_monitor()
-    
+
     if not price_monitor.is_running:
         raise HTTPException(
             status_code=503,
             detail="El monitor de precios no está activo. Inténtelo de nuevo más tarde."
         )
-    
-    return {coin_id: tick for coin_id, tick in price_monitor.latest_ticks.items()}
+
+    return ORJSONResponse(_TICKS_TA.dump_python(price_monitor.latest_ticks, mode="json"))
 
 
 @router.get("/prices/{coin_id}", response_model=CryptoTick)
@@ -59,8 +101,15 @@ async def get_coin_price(
     """
     Devuelve el precio actual de una criptomoneda específica.
     """
+    try:
+        raw = await get_redis().get(f"tick:{coin_id}")
+        if raw is not None:
+            return orjson.loads(raw)
+    except Exception:
+        logger.debug("Redis no disponible, usando ticks en memoria")
+
     price_monitor = get_price_monitor()
-    
+
     if coin_id not in price_monitor.latest_ticks:
         raise HTTPException(
             status_code=404,
@@ -70,20 +119,20 @@ async def get_coin_price(
     return price_monitor.latest_ticks[coin_id]
 
 
-@router.get("/stats", response_model=Dict[str, StatisticsModel])
+@router.get("/stats")
 async def get_statistics():
     """
     Devuelve las estadísticas actuales de todas las criptomonedas monitoreadas.
     """
     price_monitor = get_price_monitor()
-    
+
     if not price_monitor.latest_stats:
         raise HTTPException(
             status_code=503,
             detail="Las estadísticas aún no están disponibles"
         )
-    
-    return {coin_id: stats for coin_id, stats in price_monitor.latest_stats.items()}
+
+    return ORJSONResponse(_STATS_TA.dump_python(price_monitor.latest_stats, mode="json"))
 
 
 @router.get("/stats/{coin_id}", response_model=StatisticsModel)
@@ -111,7 +160,7 @@ async def create_subscription(subscription: PriceSubscription):
     """
     price_monitor = get_price_monitor()
     
-    if subscription.coin_id not in settings.crypto_id_list:
+    if subscription.coin_id not in settings.crypto_id_set:
         raise HTTPException(
             status_code=400,
             detail=f"La criptomoneda {subscription.coin_id} no está en la lista de monitoreo"
@@ -126,30 +175,76 @@ async def create_subscription(subscription: PriceSubscription):
 async def websocket_endpoint(websocket: WebSocket):
     """
     Endpoint WebSocket para recibir actualizaciones de precios en tiempo real.
+
+    Se suscribe al canal 'channel:ticks' de Redis Pub/Sub (publicado una sola
+    vez por el monitor), por lo que los clientes reciben los ticks de todos
+    los workers sin registrar observadores en el proceso local.
     """
     await websocket.accept()
-    
-    # Clase observadora que enviará actualizaciones al WebSocket
-    class WebSocketObserver:
-        async def update(self, subject, **kwargs):
-            if "tick" in kwargs:
-                tick = kwargs["tick"]
-                await websocket.send_json(tick.__dict__)
-            elif "alert" in kwargs:
-                alert = kwargs["alert"]
-                await websocket.send_json(alert.__dict__)
-    
-    # Registrar observador
-    price_monitor = get_price_monitor()
-    observer = WebSocketObserver()
-    price_monitor.register_observer(observer)
-    
+
+    pubsub = get_redis().pubsub()
+    await pubsub.subscribe("channel:ticks")
+
+    # Cola acotada por conexión: un cliente lento descarta sus ticks más
+    # antiguos en lugar de frenar al productor o acumular memoria sin límite
+    queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+
+    # Tres tareas por conexión: reenviar pub/sub a la cola, vaciar la cola
+    # hacia el cliente y leer del socket. La lectura no espera datos útiles:
+    # es la única forma de detectar una desconexión mientras el canal está
+    # ocioso (monitor parado o entre intervalos).
+    writer = asyncio.create_task(_drain_websocket_queue(websocket, queue))
+    reader = asyncio.create_task(_watch_websocket_disconnect(websocket))
+    forwarder = asyncio.create_task(_forward_pubsub_messages(pubsub, queue))
+    tasks = (writer, reader, forwarder)
+
+    try:
+        # Derribar la conexión en cuanto termine cualquiera de las tareas
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pubsub.unsubscribe("channel:ticks")
+        await pubsub.aclose()
+
+
+async def _forward_pubsub_messages(pubsub, queue: asyncio.Queue):
+    """
+    Tarea que encola cada mensaje publicado tal cual (ya serializado).
+    """
+    async for message in pubsub.listen():
+        if message["type"] != "message":
+            continue
+        try:
+            queue.put_nowait(message["data"])
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.put_nowait(message["data"])
+
+
+async def _watch_websocket_disconnect(websocket: WebSocket):
+    """
+    Tarea lectora que consume el flujo entrante solo para detectar el cierre.
+    """
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+async def _drain_websocket_queue(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Tarea escritora que envía al cliente los mensajes encolados.
+    """
     try:
-        # Mantener la conexión abierta
         while True:
-            data = await websocket.receive_text()
-            # Podríamos procesar comandos aquí si fuera necesario
-    except WebSocketDisconnect:
-        # Eliminar observador cuando se cierra la conexión
-        price_monitor.unregister_observer(observer)
+            data = await queue.get()
+            await websocket.send_bytes(data)
+    except (WebSocketDisconnect, RuntimeError):
+        # El cliente cerró la conexión; la espera del endpoint lo detecta
+        pass
 
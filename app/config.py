@@ -2,9 +2,9 @@
 Configuración de la aplicación de monitoreo de criptomonedas.
 """
 import os
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -27,18 +27,42 @@ class Settings(BaseSettings):
     
     # Configuración de la base de datos
     DATABASE_URL: str = "sqlite:///./crypto_monitor.db"
+
+    # Configuración de Redis (caché compartida entre workers)
+    REDIS_URL: str = "redis://localhost:6379/0"
     
     # Configuración de FastAPI
     API_PREFIX: str = "/api"
     DEBUG: bool = True
     
+    # Resultado del parseo de CRYPTO_IDS, calculado una sola vez
+    _crypto_id_list: Tuple[str, ...] = PrivateAttr(default=())
+    _crypto_id_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+
+    @model_validator(mode="after")
+    def _parse_crypto_ids(self) -> "Settings":
+        """
+        Parsea CRYPTO_IDS una única vez en lugar de en cada acceso.
+        """
+        ids = tuple(cid.strip() for cid in self.CRYPTO_IDS.split(",") if cid.strip())
+        self._crypto_id_list = ids
+        self._crypto_id_set = frozenset(ids)
+        return self
+
     @property
-    def crypto_id_list(self) -> List[str]:
+    def crypto_id_list(self) -> Tuple[str, ...]:
         """
-        Lista de IDs de criptomonedas a monitorear.
+        Lista (inmutable) de IDs de criptomonedas a monitorear.
         """
-        return [cid.strip() for cid in self.CRYPTO_IDS.split(",") if cid.strip()]
-    
+        return self._crypto_id_list
+
+    @property
+    def crypto_id_set(self) -> FrozenSet[str]:
+        """
+        Conjunto de IDs para pruebas de pertenencia en tiempo constante.
+        """
+        return self._crypto_id_set
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -49,3 +73,22 @@ class Settings(BaseSettings):
 # Instancia global de configuración
 settings = Settings()
 
+
+# Cliente global de Redis (creado de forma perezosa)
+_redis_instance = None
+
+
+def get_redis() -> "redis.asyncio.Redis":
+    """
+    Devuelve el cliente global de Redis, creándolo en el primer acceso.
+
+    Returns:
+        redis.asyncio.Redis: Cliente asíncrono conectado según REDIS_URL
+    """
+    global _redis_instance
+    if _redis_instance is None:
+        import redis.asyncio
+
+        _redis_instance = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _redis_instance
+
@@ -3,17 +3,18 @@ Punto de entrada principal para la aplicación de monitoreo de criptomonedas.
 """
 import logging
 import sys
+import time
 from contextlib import asynccontextmanager
 
 import structlog
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from structlog.stdlib import LoggerFactory
 
 from app.api.router import router
-from app.config import settings
+from app.config import get_redis, settings
 from app.services.price_monitor import get_price_monitor, PriceMonitor
 
 
@@ -26,41 +27,57 @@ logging.basicConfig(
     ]
 )
 
-# Configurar structlog para logging estructurado
+# Configurar structlog para logging estructurado. El wrapper filtrante
+# descarta los niveles desactivados antes de ejecutar la cadena de
+# procesadores, en lugar de procesarlo todo y filtrar al final.
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
         structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
         structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
     ],
     context_class=dict,
     logger_factory=LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(
+        logging.DEBUG if settings.DEBUG else logging.INFO
+    ),
     cache_logger_on_first_use=True,
 )
 
 logger = structlog.get_logger("app.main")
 
 
+# Rutas de alta frecuencia / bajo valor que no merecen una línea de log
+_SKIP_LOGGING_PATHS = frozenset({
+    "/",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    f"{settings.API_PREFIX}/health",
+})
+
+
 # Clase para middleware de logging
 class LoggingMiddleware(BaseHTTPMiddleware):
     """
     Middleware para registrar información sobre cada solicitud y respuesta HTTP.
     """
-    
+
     async def dispatch(self, request: Request, call_next):
-        start_time = structlog.get_timestamp()
-        
+        # Sondeos y documentación: pasar directo sin medir ni registrar
+        if request.url.path in _SKIP_LOGGING_PATHS:
+            return await call_next(request)
+
+        start = time.perf_counter_ns()
+
         response = await call_next(request)
-        
-        process_time_ms = (structlog.get_timestamp() - start_time) * 1000
-        
+
+        process_time_ms = (time.perf_counter_ns() - start) / 1e6
+
         logger.info(
             "Solicitud HTTP",
             method=request.method,
@@ -73,6 +90,29 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+# Observador que publica ticks y alertas en Redis Pub/Sub
+class RedisTickPublisher:
+    """
+    Observador que publica cada tick/alerta en el canal 'channel:ticks'
+    de Redis, de modo que todos los workers puedan reenviarlos a sus
+    clientes WebSocket sin depender del monitor local.
+    """
+
+    async def update(self, subject, tick=None, alert=None,
+                     tick_bytes=None, alert_bytes=None, **kwargs):
+        # Reutilizar los frames pre-serializados por notify_observers. Una
+        # notificación fusionada puede traer tick y alerta a la vez: ambos
+        # frames se publican, cada uno por separado.
+        try:
+            redis = get_redis()
+            if tick_bytes is not None:
+                await redis.publish("channel:ticks", tick_bytes)
+            if alert_bytes is not None:
+                await redis.publish("channel:ticks", alert_bytes)
+        except Exception as e:
+            logger.warning("No se pudo publicar en Redis Pub/Sub", error=str(e))
+
+
 # Manejador de eventos de inicio/cierre
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -81,15 +121,18 @@ async def lifespan(app: FastAPI):
     """
     # Código que se ejecuta al iniciar
     logger.info("Iniciando aplicación de monitoreo de criptomonedas")
-    
-    # Iniciar el monitor de precios
+
+    # Iniciar el monitor de precios y publicar sus eventos en Redis
     price_monitor = get_price_monitor()
+    publisher = RedisTickPublisher()
+    price_monitor.register_observer(publisher)
     await price_monitor.start()
-    
+
     yield  # Aquí la aplicación está en funcionamiento
-    
+
     # Código que se ejecuta al cerrar
     logger.info("Deteniendo aplicación")
+    price_monitor.unregister_observer(publisher)
     await price_monitor.stop()
 
 
@@ -110,6 +153,7 @@ app = FastAPI(
     redoc_url="/redoc",
     lifespan=lifespan,
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -159,13 +203,21 @@ async def root():
 
 # Esta sección se ejecuta solo si este archivo se ejecuta directamente
 if __name__ == "__main__":
+    import os
+
     import uvicorn
-    
-    # Iniciar servidor uvicorn
+
+    # Iniciar servidor uvicorn con el bucle uvloop y el parser httptools
+    # (ambos vienen con uvicorn[standard]); en producción, un worker por CPU.
+    # El fan-out por Redis Pub/Sub hace seguro el modo multi-worker.
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=1 if settings.DEBUG else (os.cpu_count() or 1),
         reload=settings.DEBUG,
         log_level="info" if settings.DEBUG else "warning",
     )
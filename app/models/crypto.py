@@ -1,24 +1,56 @@
 """
 Modelos de datos para información de criptomonedas.
 """
+import time
 from dataclasses import dataclass, field
-from datetime import datetime
-from enum import Enum
+from datetime import datetime, timezone
+from enum import IntEnum
 from typing import Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field, validator
+import msgspec
+from pydantic import BaseModel, Field, computed_field, validator
 
 
-class PriceAlertType(str, Enum):
-    """Tipos de alertas de precio"""
-    PRICE_INCREASE = "price_increase"
-    PRICE_DECREASE = "price_decrease"
-    VOLATILITY = "volatility"
-    VOLUME_SPIKE = "volume_spike"
-    MARKET_CAP_CHANGE = "market_cap_change"
+def _now_ms() -> int:
+    """
+    Timestamp actual en milisegundos de época: mucho más barato de construir
+    y serializar que un objeto datetime.
+    """
+    return time.time_ns() // 1_000_000
+
+
+class PriceAlertType(IntEnum):
+    """
+    Tipos de alertas de precio.
+
+    IntEnum en lugar de (str, Enum): las comparaciones en el bucle del
+    monitor son enteros a nivel C y no operaciones de cadena.
+    """
+    PRICE_INCREASE = 1
+    PRICE_DECREASE = 2
+    VOLATILITY = 3
+    VOLUME_SPIKE = 4
+    MARKET_CAP_CHANGE = 5
+
+    @property
+    def label(self) -> str:
+        """Nombre del tipo tal como se emite en el JSON (formato original)."""
+        return _ALERT_LABELS[self]
 
 
-@dataclass
+# Etiquetas precalculadas: evitan .value/.upper() por cada alerta construida
+_ALERT_LABELS = {
+    PriceAlertType.PRICE_INCREASE: "price_increase",
+    PriceAlertType.PRICE_DECREASE: "price_decrease",
+    PriceAlertType.VOLATILITY: "volatility",
+    PriceAlertType.VOLUME_SPIKE: "volume_spike",
+    PriceAlertType.MARKET_CAP_CHANGE: "market_cap_change",
+}
+
+_ALERT_TITLES = {alert_type: label.upper() for alert_type, label in _ALERT_LABELS.items()}
+
+
+@dataclass(slots=True, frozen=True)
 class CryptoTick:
     """
     Representa un único registro de precio de criptomoneda en un momento dado.
@@ -29,10 +61,10 @@ class CryptoTick:
     market_cap_usd: Optional[float] = None
     volume_24h_usd: Optional[float] = None
     price_change_24h_percent: Optional[float] = None
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp_ms: int = field(default_factory=_now_ms)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PriceAlert:
     """
     Alerta generada cuando el precio cumple ciertas condiciones.
@@ -43,14 +75,14 @@ class PriceAlert:
     old_price_usd: float
     new_price_usd: float
     change_percent: float
-    timestamp: datetime = field(default_factory=datetime.now)
-    message: str = field(init=False)
-    
-    def __post_init__(self):
-        """Genera el mensaje de alerta automáticamente"""
+    timestamp_ms: int = field(default_factory=_now_ms)
+
+    @property
+    def message(self) -> str:
+        """Mensaje descriptivo de la alerta, generado bajo demanda."""
         direction = "aumentó" if self.change_percent > 0 else "disminuyó"
-        self.message = (
-            f"¡{self.alert_type.value.upper()}! El precio de {self.symbol.upper()} "
+        return (
+            f"¡{_ALERT_TITLES[self.alert_type]}! El precio de {self.symbol.upper()} "
             f"{direction} un {abs(self.change_percent):.2f}% "
             f"(${self.old_price_usd:.2f} → ${self.new_price_usd:.2f})"
         )
@@ -67,11 +99,23 @@ class StatisticsModel(BaseModel):
     ema_20: Optional[float] = None  # Media móvil exponencial de 20 períodos
     volatility_24h: Optional[float] = None  # Desviación estándar de 24h (%)
     rsi_14: Optional[float] = None  # Índice de fuerza relativa (14 períodos)
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp_ms: int = Field(default_factory=_now_ms)
 
+    @computed_field
+    @property
+    def timestamp(self) -> datetime:
+        """Timestamp como datetime, construido solo al serializar."""
+        return datetime.fromtimestamp(self.timestamp_ms / 1000, tz=timezone.utc)
 
-class CoinGeckoMarketData(BaseModel):
-    """Modelo para datos de mercado de CoinGecko"""
+
+class CoinGeckoMarketData(msgspec.Struct, kw_only=True):
+    """
+    Modelo para datos de mercado de CoinGecko.
+
+    msgspec.Struct en lugar de Pydantic: la respuesta de /coins/markets se
+    decodifica y valida en una sola pasada en C directamente desde los bytes
+    HTTP, sin diccionarios intermedios.
+    """
     id: str
     symbol: str
     name: str
@@ -1,12 +1,20 @@
 """
 Implementación del patrón Observer para notificaciones de precios de criptomonedas.
 """
+import asyncio
+import logging
 from abc import ABC, abstractmethod
+from dataclasses import asdict
 from typing import Any, Dict, List, Optional, Protocol, Set, TypeVar
 
+import orjson
+
 from app.models.crypto import PriceAlert, CryptoTick
 
 
+logger = logging.getLogger(__name__)
+
+
 class Observer(Protocol):
     """Interfaz base para observadores."""
     
@@ -34,26 +42,32 @@ class Observable:
     """Clase base para objetos observables."""
     
     def __init__(self):
-        """Inicializa el conjunto de observadores."""
-        self._observers: Set[Observer] = set()
-    
+        """Inicializa la lista de observadores."""
+        # Lista en lugar de set: se itera en cada tick y los registros son
+        # raros, así que el recorrido contiguo gana al sondeo de la tabla hash
+        self._observers: List[Observer] = []
+
     def register_observer(self, observer: Observer) -> None:
         """
         Registra un nuevo observador.
-        
+
         Args:
             observer: El observador a agregar
         """
-        self._observers.add(observer)
-    
+        if observer not in self._observers:
+            self._observers.append(observer)
+
     def unregister_observer(self, observer: Observer) -> None:
         """
         Elimina un observador.
-        
+
         Args:
             observer: El observador a eliminar
         """
-        self._observers.discard(observer)
+        try:
+            self._observers.remove(observer)
+        except ValueError:
+            pass
     
     async def notify_observers(self,
                              tick: Optional[CryptoTick] = None,
@@ -66,6 +80,35 @@ class Observable:
             tick: Opcional, nuevo tick de precio
             alert: Opcional, nueva alerta de precio
             **kwargs: Datos adicionales para pasar a los observadores
+
+        Los observadores que solo reenvían bytes (Redis, WebSockets) reciben
+        además ``tick_bytes``/``alert_bytes`` serializados una única vez por
+        difusión, en lugar de codificar el JSON una vez por observador.
         """
-        for observer in self._observers:
-            await observer.update(self, tick=tick, alert=alert, **kwargs)
+        # Copia inmutable por si un observador se (des)registra durante la notificación
+        observers = tuple(self._observers)
+        if not observers:
+            return
+
+        # Serializar una sola vez por difusión, no una vez por observador
+        if tick is not None and "tick_bytes" not in kwargs:
+            kwargs["tick_bytes"] = orjson.dumps(asdict(tick))
+        if alert is not None and "alert_bytes" not in kwargs:
+            alert_data = asdict(alert)
+            # Emitir el tipo con su etiqueta original, no el valor del IntEnum
+            alert_data["alert_type"] = alert.alert_type.label
+            alert_data["message"] = alert.message
+            kwargs["alert_bytes"] = orjson.dumps(alert_data)
+
+        # Notificar en paralelo: un observador lento no bloquea a los demás,
+        # y un observador roto no aborta la difusión
+        results = await asyncio.gather(
+            *(observer.update(self, tick=tick, alert=alert, **kwargs) for observer in observers),
+            return_exceptions=True,
+        )
+
+        for observer, result in zip(observers, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Error notificando al observador %r: %s", observer, result
+                )
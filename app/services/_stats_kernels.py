@@ -0,0 +1,97 @@
+"""
+Kernels numéricos para el cálculo de estadísticas del monitor de precios.
+
+Cuando numba está disponible, el kernel se compila con @njit a un bucle a
+velocidad de C que recorre el buffer de precios una única vez y sin arrays
+temporales; si no lo está, se usa la misma función en Python puro.
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _last_stats_py(prices, sma_window, vol_window):
+    """
+    Calcula en una sola pasada las estadísticas de la cola del buffer.
+
+    Args:
+        prices: Array float64 de precios en orden temporal
+        sma_window: Ancho de la ventana de la media móvil simple
+        vol_window: Ancho de la ventana de la desviación estándar
+
+    Returns:
+        Tupla (media_total, sma, desviación estándar muestral de la ventana)
+    """
+    n = prices.size
+    w_sma = sma_window if sma_window < n else n
+    w_vol = vol_window if vol_window < n else n
+    sma_start = n - w_sma
+    vol_start = n - w_vol
+
+    s_total = 0.0
+    s_sma = 0.0
+    s_vol = 0.0
+    s2_vol = 0.0
+
+    for i in range(n):
+        p = prices[i]
+        s_total += p
+        if i >= sma_start:
+            s_sma += p
+        if i >= vol_start:
+            s_vol += p
+            s2_vol += p * p
+
+    mean_total = s_total / n
+    sma = s_sma / w_sma
+
+    if w_vol > 1:
+        variance = (s2_vol - s_vol * s_vol / w_vol) / (w_vol - 1)
+        std = math.sqrt(variance) if variance > 0.0 else 0.0
+    else:
+        std = 0.0
+
+    return mean_total, sma, std
+
+
+if njit is not None:
+    last_stats = njit(cache=True, fastmath=True)(_last_stats_py)
+else:
+    last_stats = _last_stats_py
+
+
+def _last_stats_batch_py(prices, sma_window, vol_window):
+    """
+    Versión por lotes de last_stats para una matriz (monedas × muestras).
+
+    Todas las monedas tickean juntas, así que comparten ventanas: una sola
+    llamada amortiza el despacho de Python entre las K filas.
+
+    Args:
+        prices: Matriz float64 (K, N) de precios en orden temporal
+        sma_window: Ancho de la ventana de la media móvil simple
+        vol_window: Ancho de la ventana de la desviación estándar
+
+    Returns:
+        Tupla (medias, smas, desviaciones) como arrays float64 de longitud K
+    """
+    k = prices.shape[0]
+    means = np.empty(k, np.float64)
+    smas = np.empty(k, np.float64)
+    stds = np.empty(k, np.float64)
+
+    for i in range(k):
+        means[i], smas[i], stds[i] = last_stats(prices[i], sma_window, vol_window)
+
+    return means, smas, stds
+
+
+if njit is not None:
+    last_stats_batch = njit(cache=True, fastmath=True)(_last_stats_batch_py)
+else:
+    last_stats_batch = _last_stats_batch_py
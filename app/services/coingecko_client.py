@@ -2,25 +2,25 @@
 Cliente asíncrono para interactuar con la API de CoinGecko.
 """
 import asyncio
+import hashlib
 import logging
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
 import httpx
-from pydantic import ValidationError
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
-
-from app.config import settings
+import msgspec
+import orjson
+
+from app.config import get_redis, settings
 from app.models.crypto import CoinGeckoMarketData, CryptoTick
 
 
 logger = logging.getLogger(__name__)
 
+# Cadenas booleanas precalculadas: indexables por bool sin str()/.lower()
+_BOOL = ("false", "true")
+
 
 class CoinGeckoAPIError(Exception):
     """Excepción para errores de la API de CoinGecko."""
@@ -32,6 +32,57 @@ class RateLimitError(CoinGeckoAPIError):
     pass
 
 
+class TokenBucket:
+    """
+    Limitador de velocidad proactivo: las solicitudes esperan un token en
+    lugar de descubrir el límite con un 429 y su ventana de enfriamiento.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Inicializa el bucket.
+
+        Args:
+            rate: Tokens generados por segundo
+            burst: Máximo de tokens acumulables
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._blocked_until = 0.0
+
+    async def acquire(self) -> None:
+        """
+        Espera hasta que haya un token disponible y lo consume.
+        """
+        async with self._lock:
+            now = time.monotonic()
+
+            # Respetar una penalización activa (p. ej. Retry-After de un 429)
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                now = time.monotonic()
+
+            # Reponer tokens según el tiempo transcurrido
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self.tokens = 0.0
+                self.last = time.monotonic()
+            else:
+                self.tokens -= 1.0
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Bloquea nuevas solicitudes durante el tiempo indicado por el servidor.
+        """
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
 class CoinGeckoClient:
     """
     Cliente asíncrono para la API de CoinGecko con manejo de errores y reintentos.
@@ -40,19 +91,25 @@ class CoinGeckoClient:
     def __init__(self, base_url: Optional[str] = None):
         """
         Inicializa el cliente.
-        
+
         Args:
             base_url: URL base de la API (opcional, por defecto usa settings)
         """
         self.base_url = base_url or settings.COINGECKO_API_URL
         self.client: Optional[httpx.AsyncClient] = None
-    
+
+        # 2 req/s mantiene el uso muy por debajo de la cuota gratuita
+        self._bucket = TokenBucket(rate=2.0, burst=2.0)
+
     async def __aenter__(self) -> 'CoinGeckoClient':
         """Contexto de entrada para usar con 'async with'."""
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
             timeout=30.0,
             follow_redirects=True,
+            http2=True,
+            headers={"Accept-Encoding": "gzip"},
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
         )
         return self
     
@@ -62,46 +119,114 @@ class CoinGeckoClient:
             await self.client.aclose()
             self.client = None
     
-    @retry(
-        retry=retry_if_exception_type(
-            (httpx.HTTPStatusError, httpx.ConnectTimeout, httpx.RequestError)
-        ),
-        wait=wait_exponential(multiplier=1, min=2, max=30),
-        stop=stop_after_attempt(5),
-    )
+    # Versión de _request_impl envuelta con la política de reintentos de
+    # tenacity, construida en el primer uso (importación perezosa)
+    _retrying_request = None
+
     async def _make_request(
-        self, method: str, endpoint: str, **kwargs: Any
-    ) -> Dict[str, Any]:
+        self,
+        method: str,
+        endpoint: str,
+        raw: bool = False,
+        bypass_cache: bool = False,
+        **kwargs: Any,
+    ) -> Any:
         """
-        Realiza una solicitud HTTP a la API con manejo de errores y reintentos.
-        
+        Realiza una solicitud HTTP a la API con reintentos exponenciales.
+
+        tenacity se importa aquí, en el primer uso real, para no pagar su
+        importación y la construcción del decorador en el arranque de cada
+        worker.
+        """
+        cls = type(self)
+        if cls._retrying_request is None:
+            from tenacity import (
+                retry,
+                retry_if_exception_type,
+                stop_after_attempt,
+                wait_exponential,
+            )
+
+            cls._retrying_request = retry(
+                retry=retry_if_exception_type(
+                    (httpx.HTTPStatusError, httpx.ConnectTimeout, httpx.RequestError)
+                ),
+                wait=wait_exponential(multiplier=1, min=2, max=30),
+                stop=stop_after_attempt(5),
+            )(cls._request_impl)
+
+        return await cls._retrying_request(
+            self, method, endpoint, raw=raw, bypass_cache=bypass_cache, **kwargs
+        )
+
+    async def _request_impl(
+        self,
+        method: str,
+        endpoint: str,
+        raw: bool = False,
+        bypass_cache: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Realiza una solicitud HTTP a la API con manejo de errores.
+
         Args:
             method: Método HTTP ('GET', 'POST', etc.)
             endpoint: Endpoint de la API (sin la URL base)
+            raw: Si es True devuelve los bytes crudos sin parsear
+            bypass_cache: Si es True no lee la caché compartida (la respuesta
+                fresca se guarda igualmente para los demás consumidores)
             **kwargs: Argumentos adicionales para httpx
-        
+
         Returns:
-            Dict con la respuesta JSON
-        
+            Dict con la respuesta JSON, o bytes crudos si raw=True
+
         Raises:
             CoinGeckoAPIError: Si hay un error en la API
             RateLimitError: Si se alcanza el límite de velocidad
         """
         if not self.client:
             raise RuntimeError("Cliente no inicializado. Usa 'async with'.")
-        
+
+        # Consultar la caché compartida antes de ir a la red: convierte
+        # N workers x M endpoints en una sola llamada por intervalo. El
+        # sondeo del propio monitor la omite: es quien produce las entradas
+        # y leerlas le devolvería su respuesta anterior aún fresca.
+        cache_key = self._cache_key(method, endpoint, kwargs.get("params"))
+        if not bypass_cache:
+            cached = await self._get_cached(cache_key, raw=raw)
+            if cached is not None:
+                return cached
+
         try:
+            # Esperar un token antes de tocar la red
+            await self._bucket.acquire()
+
             response = await self.client.request(method, endpoint, **kwargs)
             response.raise_for_status()
-            
-            # Validar la respuesta
-            return response.json()
-        
+
+            # Guardar la respuesta en caché antes de devolverla
+            data = response.content if raw else response.json()
+            await self._store_cached(cache_key, data, raw=raw)
+            return data
+
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 logger.warning("Límite de velocidad alcanzado en CoinGecko API")
+
+                # Honrar el Retry-After del servidor antes de volver a intentar
+                retry_after = e.response.headers.get("retry-after")
+                if retry_after and retry_after.isdigit():
+                    self._bucket.penalize(int(retry_after))
+
+                # Antes de fallar, intentar servir la copia obsoleta
+                stale = await self._get_cached("stale:" + cache_key, raw=raw)
+                if stale is not None:
+                    logger.warning("Sirviendo respuesta obsoleta de la caché")
+                    return stale
+
                 raise RateLimitError("Límite de velocidad alcanzado") from e
-            
+
             logger.error(
                 f"Error HTTP {e.response.status_code} en CoinGecko API: {e.response.text}"
             )
@@ -110,7 +235,43 @@ class CoinGeckoClient:
         except httpx.RequestError as e:
             logger.error(f"Error de solicitud en CoinGecko API: {str(e)}")
             raise CoinGeckoAPIError(f"Error de solicitud: {str(e)}") from e
-    
+
+    @staticmethod
+    def _cache_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        """
+        Construye la clave de caché a partir del método, endpoint y parámetros.
+        """
+        raw = f"{method}{endpoint}{sorted((params or {}).items())}"
+        return "cg:" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    async def _get_cached(key: str, raw: bool = False) -> Optional[Any]:
+        """
+        Lee una respuesta cacheada de Redis; None si no existe o Redis falla.
+        """
+        try:
+            cached = await get_redis().get(key)
+        except Exception:
+            return None
+        if cached is None:
+            return None
+        return cached if raw else orjson.loads(cached)
+
+    @staticmethod
+    async def _store_cached(key: str, data: Any, raw: bool = False) -> None:
+        """
+        Guarda la respuesta en Redis: copia fresca con TTL de un intervalo de
+        monitoreo y copia obsoleta de 1h para sobrevivir a los límites de cuota.
+        """
+        try:
+            payload = data if raw else orjson.dumps(data)
+            redis = get_redis()
+            await redis.set(key, payload, ex=settings.MONITORING_INTERVAL_SECONDS)
+            await redis.set("stale:" + key, payload, ex=3600)
+        except Exception:
+            # Redis es opcional: sin caché simplemente vamos siempre a la red
+            pass
+
     async def get_ping(self) -> bool:
         """
         Verifica que la API esté funcionando.
@@ -122,36 +283,42 @@ class CoinGeckoClient:
         return "gecko_says" in response
     
     async def get_price(
-        self, 
-        coin_ids: List[str], 
+        self,
+        coin_ids: Union[List[str], str],
         vs_currencies: List[str] = ["usd"],
         include_market_cap: bool = True,
         include_24h_vol: bool = True,
         include_24h_change: bool = True,
+        bypass_cache: bool = False,
     ) -> Dict[str, Dict[str, float]]:
         """
         Obtiene los precios actuales de múltiples criptomonedas.
-        
+
         Args:
-            coin_ids: Lista de IDs de criptomonedas
+            coin_ids: Lista de IDs de criptomonedas, o la cadena ya unida por
+                comas (evita re-unir una lista estática en cada sondeo)
             vs_currencies: Lista de monedas fiat (por defecto ["usd"])
             include_market_cap: Incluir capitalización de mercado
             include_24h_vol: Incluir volumen de 24h
             include_24h_change: Incluir cambio de precio de 24h
-        
+            bypass_cache: Si es True va siempre a la red (para el sondeo del
+                monitor, que es quien alimenta la caché)
+
         Returns:
             Dict con precios y datos adicionales
         """
         params = {
-            "ids": ",".join(coin_ids),
+            "ids": coin_ids if isinstance(coin_ids, str) else ",".join(coin_ids),
             "vs_currencies": ",".join(vs_currencies),
-            "include_market_cap": str(include_market_cap).lower(),
-            "include_24hr_vol": str(include_24h_vol).lower(),
-            "include_24hr_change": str(include_24h_change).lower(),
+            "include_market_cap": _BOOL[include_market_cap],
+            "include_24hr_vol": _BOOL[include_24h_vol],
+            "include_24hr_change": _BOOL[include_24h_change],
             "precision": "full",
         }
-        
-        return await self._make_request("GET", "/simple/price", params=params)
+
+        return await self._make_request(
+            "GET", "/simple/price", bypass_cache=bypass_cache, params=params
+        )
     
     async def get_coins_markets(
         self,
@@ -185,7 +352,7 @@ class CoinGeckoClient:
             "order": order,
             "per_page": per_page,
             "page": page,
-            "sparkline": str(sparkline).lower(),
+            "sparkline": _BOOL[sparkline],
         }
         
         if ids:
@@ -195,10 +362,11 @@ class CoinGeckoClient:
         if price_change_percentage:
             params["price_change_percentage"] = price_change_percentage
         
-        data = await self._make_request("GET", "/coins/markets", params=params)
-        
+        raw = await self._make_request("GET", "/coins/markets", params=params, raw=True)
+
         try:
-            return [CoinGeckoMarketData(**item) for item in data]
-        except ValidationError as e:
-            logger.error("Error al validar datos de la API", error=str(e))
+            # Decodificar y validar en una sola pasada desde los bytes crudos
+            return msgspec.json.decode(raw, type=List[CoinGeckoMarketData])
+        except msgspec.DecodeError as e:
+            logger.error("Error al validar datos de la API: %s", e)
             raise CoinGeckoAPIError("Datos de API inválidos") from e
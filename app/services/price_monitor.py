@@ -2,52 +2,163 @@
 Monitor de precios de criptomonedas que implementa el patrón Observer.
 """
 import asyncio
+import functools
 import logging
-from collections import deque
-from datetime import datetime
-from typing import Dict, List, Optional, Set, Deque
+import math
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional, Set
 
-import pandas as pd
+import numpy as np
+import orjson
 import structlog
 from structlog.processors import JSONRenderer
 
-from app.config import settings
-from app.models.crypto import CryptoTick, PriceAlert, PriceAlertType, StatisticsModel
+from app.config import get_redis, settings
+from app.models.crypto import (
+    CryptoTick,
+    PriceAlert,
+    PriceAlertType,
+    StatisticsModel,
+    _now_ms,
+)
 from app.models.observer import Observable
+from app.services._stats_kernels import last_stats_batch
 from app.services.coingecko_client import CoinGeckoClient, CoinGeckoAPIError
 
 
-# Configurar logger estructurado
-structlog.configure(
+def _log_serializer(obj, **kwargs):
+    """Serializa los registros de log con orjson (varias veces más rápido
+    que el codificador puro-Python del módulo json estándar)."""
+    return orjson.dumps(obj).decode()
+
+
+# Filtrado por nivel a velocidad de C: un log por debajo del nivel se
+# descarta sin construir kwargs ni recorrer los procesadores
+_wrapper_class = structlog.make_filtering_bound_logger(
+    logging.DEBUG if settings.DEBUG else logging.INFO
+)
+
+# Logger del camino caliente: cadena mínima de procesadores. StackInfoRenderer
+# y format_exc_info son puro coste en registros sin excepción, así que aquí
+# no aparecen.
+logger = structlog.wrap_logger(
+    logging.getLogger("price_monitor"),
+    processors=[
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+        JSONRenderer(serializer=_log_serializer),
+    ],
+    wrapper_class=_wrapper_class,
+)
+
+# Logger de errores: cadena completa, con stack e información de excepción.
+# Solo se usa en las ramas except, donde el coste extra está justificado.
+err_logger = structlog.wrap_logger(
+    logging.getLogger("price_monitor"),
     processors=[
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
-        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
-        JSONRenderer(),
+        JSONRenderer(serializer=_log_serializer),
     ],
-    logger_factory=structlog.stdlib.LoggerFactory(),
+    wrapper_class=_wrapper_class,
 )
 
-logger = structlog.get_logger("price_monitor")
 
+def _close(a: Optional[float], b: Optional[float]) -> bool:
+    """Compara dos valores opcionales con tolerancia de coma flotante."""
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-12, abs_tol=0.0)
 
-# Variable global para mantener una única instancia del monitor
-_price_monitor_instance = None
+
+def _stats_unchanged(
+    prev: StatisticsModel,
+    current_price: float,
+    sma_20: Optional[float],
+    ema_20: Optional[float],
+    volatility_24h: Optional[float],
+) -> bool:
+    """
+    Indica si las estadísticas recién calculadas coinciden con las últimas
+    publicadas, en cuyo caso no merece la pena reconstruir el modelo.
+    """
+    return (
+        _close(prev.current_price, current_price)
+        and _close(prev.sma_20, sma_20)
+        and _close(prev.ema_20, ema_20)
+        and _close(prev.volatility_24h, volatility_24h)
+    )
 
 
+@functools.cache
 def get_price_monitor() -> 'PriceMonitor':
     """
     Devuelve la instancia global del monitor de precios.
-    
+
+    functools.cache sustituye al patrón global + comprobación de None: la
+    instancia se crea en la primera llamada y las siguientes son una única
+    búsqueda en C.
+
     Returns:
         PriceMonitor: La instancia única del monitor de precios
     """
-    global _price_monitor_instance
-    if _price_monitor_instance is None:
-        _price_monitor_instance = PriceMonitor()
-    return _price_monitor_instance
+    return PriceMonitor()
+
+
+class PriceRing:
+    """
+    Buffer circular de tamaño fijo para K monedas × N muestras.
+
+    Los precios viven en una única matriz float64 (K, N) preasignada: como
+    /simple/price devuelve todas las monedas juntas, cada intervalo escribe
+    una columna completa y las estadísticas se calculan para las K filas en
+    una sola pasada por lotes.
+    """
+
+    def __init__(self, n: int, coins: int):
+        """
+        Inicializa el buffer con capacidad para n muestras por moneda.
+        """
+        self.n = n
+        self.coins = coins
+        self.price = np.zeros((coins, n), np.float64)
+        self.ts = np.zeros(n, np.int64)
+        self.head = 0   # Posición (columna) de la próxima escritura
+        self.count = 0  # Columnas válidas almacenadas (<= n)
+        # Buffer interno para "desenrollar" cuando el anillo ha dado la vuelta
+        self._unwrap_buf = np.empty((coins, n), np.float64)
+
+    def append_column(self, prices: np.ndarray, ts: int) -> None:
+        """
+        Escribe la columna de precios del intervalo actual y avanza la cabeza.
+        """
+        pos = self.head
+        self.price[:, pos] = prices
+        self.ts[pos] = ts
+        self.head = (pos + 1) % self.n
+        if self.count < self.n:
+            self.count += 1
+
+    def unwrapped(self) -> np.ndarray:
+        """
+        Devuelve la matriz (K, count) con las columnas en orden temporal.
+
+        Mientras el anillo no ha dado la vuelta es una vista sin copia; una
+        vez lleno se copia al buffer interno de desenrollado (sin asignar
+        memoria nueva).
+        """
+        if self.count < self.n:
+            return self.price[:, :self.count]
+        if self.head == 0:
+            return self.price
+        k = self.n - self.head
+        self._unwrap_buf[:, :k] = self.price[:, self.head:]
+        self._unwrap_buf[:, k:] = self.price[:, :self.head]
+        return self._unwrap_buf
 
 
 class PriceMonitor(Observable):
@@ -63,6 +174,11 @@ class PriceMonitor(Observable):
         super().__init__()
         self.is_running = False
         self.crypto_ids = settings.crypto_id_list
+        # La lista es estática: unirla una sola vez para todos los sondeos
+        self._crypto_ids_param = ",".join(self.crypto_ids)
+        # Contexto inmutable enlazado una sola vez para los logs del ciclo
+        # de vida del monitor
+        self._log = logger.bind(crypto_ids=self._crypto_ids_param)
         self.interval = settings.MONITORING_INTERVAL_SECONDS
         self.threshold = settings.PRICE_CHANGE_THRESHOLD_PERCENT
         self.buffer_size = settings.STATISTICS_BUFFER_SIZE
@@ -70,11 +186,31 @@ class PriceMonitor(Observable):
         # Almacena el último tick para cada criptomoneda
         self.latest_ticks: Dict[str, CryptoTick] = {}
         
-        # Buffer circular para cada moneda para cálculos estadísticos
-        self.price_history: Dict[str, Deque[CryptoTick]] = {
-            coin_id: deque(maxlen=self.buffer_size) for coin_id in self.crypto_ids
-        }
-        
+        # Buffer circular NumPy compartido por todas las monedas: una matriz
+        # (K, N) escrita por columnas, una por intervalo
+        self._coin_index = {c: i for i, c in enumerate(self.crypto_ids)}
+        self.price_history = PriceRing(self.buffer_size, len(self.crypto_ids))
+
+        # Último precio/timestamp conocidos por moneda en formato SoA: la
+        # comprobación de umbral trabaja sobre estos arrays sin pasar por
+        # los objetos CryptoTick (que solo se construyen para notificar).
+        # Si una moneda falta en una respuesta conserva su último valor.
+        self._last_price = np.zeros(len(self.crypto_ids), dtype=np.float64)
+        self._last_ts = np.zeros(len(self.crypto_ids), dtype=np.int64)
+
+        # Total de intervalos procesados
+        self._tick_count = 0
+
+        # Anchos de ventana de las estadísticas: constantes de instancia
+        # fijadas una vez, no recalculadas por llamada
+        self._sma_window = 20
+        self._vol_window = 24
+
+        # EMA-20 vectorizada: ema = alpha*precio + (1-alpha)*ema por fila
+        # (NaN hasta el primer tick de cada moneda)
+        self._ema_alpha = 2.0 / (self._sma_window + 1)
+        self._ema_vec = np.full(len(self.crypto_ids), np.nan)
+
         # Últimas estadísticas calculadas
         self.latest_stats: Dict[str, StatisticsModel] = {}
         
@@ -86,12 +222,12 @@ class PriceMonitor(Observable):
         Inicia el monitoreo de precios en un bucle asíncrono.
         """
         if self.is_running:
-            logger.warning("El monitor de precios ya está en ejecución")
+            self._log.warning("El monitor de precios ya está en ejecución")
             return
         
         self.is_running = True
         self._task = asyncio.create_task(self._monitoring_loop())
-        logger.info("Monitor de precios iniciado", crypto_ids=",".join(self.crypto_ids))
+        self._log.info("Monitor de precios iniciado")
     
     async def stop(self):
         """
@@ -109,52 +245,117 @@ class PriceMonitor(Observable):
                 pass
             self._task = None
         
-        logger.info("Monitor de precios detenido")
+        self._log.info("Monitor de precios detenido")
     
     async def _monitoring_loop(self):
         """
         Bucle principal que consulta precios periódicamente.
+
+        La consulta del siguiente intervalo se lanza como tarea antes de la
+        espera, de modo que la ida y vuelta HTTP transcurre durante el sleep
+        en lugar de sumarse en serie al período del bucle.
+
+        La espera se calcula contra una rejilla de plazos sobre el reloj
+        monotónico: dormir un intervalo fijo tras cada iteración haría que el
+        período efectivo derivase hacia arriba con el coste del procesamiento
+        y las ventanas estadísticas perderían su espaciado regular.
         """
         async with CoinGeckoClient() as client:
-            while self.is_running:
+            # Prelanzar la primera consulta
+            fetch_task = asyncio.create_task(self._fetch_prices(client))
+            next_deadline = time.monotonic() + self.interval
+
+            try:
+                while self.is_running:
+                    try:
+                        price_data = await fetch_task
+                        await self._process_prices(price_data)
+
+                        # Calcular estadísticas si hay suficientes datos
+                        await self._calculate_statistics()
+
+                    except CoinGeckoAPIError as e:
+                        err_logger.error("Error al consultar la API", error=str(e))
+                    except Exception as e:
+                        err_logger.exception("Error inesperado en el monitoreo", error=str(e))
+
+                    # Solapar la consulta del próximo intervalo con la espera
+                    fetch_task = asyncio.create_task(self._fetch_prices(client))
+
+                    delay = next_deadline - time.monotonic()
+                    if delay > 0.0:
+                        await asyncio.sleep(delay)
+                        next_deadline += self.interval
+                    else:
+                        # El bucle va retrasado: re-anclar la rejilla al
+                        # presente en lugar de encadenar intervalos en déficit
+                        next_deadline = time.monotonic() + self.interval
+                        await asyncio.sleep(0)
+            finally:
+                # No dejar una consulta huérfana en vuelo al detener el
+                # monitor: cancelarla y consumir su resultado, incluida una
+                # posible excepción ya producida (sin esto, un sondeo fallido
+                # pendiente emite "Task exception was never retrieved")
+                fetch_task.cancel()
                 try:
-                    await self._fetch_and_process_prices(client)
-                    
-                    # Calcular estadísticas si hay suficientes datos
-                    await self._calculate_statistics()
-                    
-                except CoinGeckoAPIError as e:
-                    logger.error("Error al consultar la API", error=str(e))
-                except Exception as e:
-                    logger.exception("Error inesperado en el monitoreo", error=str(e))
-                
-                # Esperar hasta la próxima consulta
-                await asyncio.sleep(self.interval)
-    
-    async def _fetch_and_process_prices(self, client: CoinGeckoClient):
+                    await fetch_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def _fetch_prices(self, client: CoinGeckoClient) -> Dict[str, Dict[str, float]]:
         """
-        Obtiene los precios actuales y procesa las actualizaciones.
-        
+        Obtiene los precios actuales de la API.
+
         Args:
             client: Cliente de CoinGecko inicializado
+
+        Returns:
+            Dict de precios por moneda tal como lo devuelve /simple/price
         """
-        # Obtener precios actuales
-        price_data = await client.get_price(
-            self.crypto_ids,
+        # bypass_cache: el sondeo se prelanza un intervalo antes de usarse,
+        # cuando la respuesta anterior (TTL = intervalo) sigue fresca en la
+        # caché compartida; sin omitirla, sondeos alternos releerían su
+        # propia respuesta y el anillo recibiría columnas duplicadas
+        return await client.get_price(
+            self._crypto_ids_param,
             vs_currencies=["usd"],
             include_market_cap=True,
             include_24h_vol=True,
-            include_24h_change=True
+            include_24h_change=True,
+            bypass_cache=True,
         )
-        
-        # Procesar cada moneda
+
+    async def _process_prices(self, price_data: Dict[str, Dict[str, float]]):
+        """
+        Procesa las actualizaciones de precios de un intervalo.
+
+        Args:
+            price_data: Respuesta de /simple/price con los precios por moneda
+        """
+        # Un único timestamp para todo el lote: la respuesta llega junta, así
+        # que todos los ticks del intervalo comparten lógicamente el instante
+        now_ms = _now_ms()
+
+        # Logger enlazado una sola vez con el contexto del intervalo: los
+        # bind repetidos dentro del bucle por moneda se evitan
+        log = logger.bind(interval_ts=now_ms)
+
+        # Procesar cada moneda: construir los ticks y volcar los precios del
+        # intervalo a un vector (las monedas ausentes conservan su último valor)
+        new_prices = self._last_price.copy()
+
+        # Ticks construidos en este intervalo, por índice de moneda: la
+        # notificación se difiere hasta conocer también la alerta de cada
+        # moneda, para hacer un único fan-out por moneda
+        new_ticks: Dict[int, CryptoTick] = {}
+
         for coin_id in self.crypto_ids:
             if coin_id not in price_data:
-                logger.warning(f"No se encontraron datos para {coin_id}")
+                log.warning(f"No se encontraron datos para {coin_id}")
                 continue
-            
+
             current_data = price_data[coin_id]
-            
+
             # Crear un nuevo tick
             new_tick = CryptoTick(
                 coin_id=coin_id,
@@ -163,105 +364,170 @@ class PriceMonitor(Observable):
                 market_cap_usd=current_data.get("usd_market_cap", None),
                 volume_24h_usd=current_data.get("usd_24h_vol", None),
                 price_change_24h_percent=current_data.get("usd_24h_change", None),
-                timestamp=datetime.now()
+                timestamp_ms=now_ms,
             )
-            
-            # Comprobar si hay un cambio significativo
-            if coin_id in self.latest_ticks:
-                old_tick = self.latest_ticks[coin_id]
-                percent_change = ((new_tick.price_usd - old_tick.price_usd) / old_tick.price_usd) * 100
-                
-                if abs(percent_change) >= self.threshold:
-                    # Crear alerta de cambio de precio
-                    alert_type = (
-                        PriceAlertType.PRICE_INCREASE if percent_change > 0 
-                        else PriceAlertType.PRICE_DECREASE
-                    )
-                    
-                    alert = PriceAlert(
-                        coin_id=coin_id,
-                        symbol=new_tick.symbol,
-                        alert_type=alert_type,
-                        old_price_usd=old_tick.price_usd,
-                        new_price_usd=new_tick.price_usd,
-                        change_percent=percent_change
-                    )
-                    
-                    # Notificar a los observadores sobre la alerta
-                    await self.notify_observers(alert=alert)
-                    logger.info(
-                        f"Alerta de cambio de precio", 
-                        coin_id=coin_id,
-                        change_percent=f"{percent_change:.2f}%",
-                        old_price=old_tick.price_usd,
-                        new_price=new_tick.price_usd
-                    )
-            
+
+            i = self._coin_index[coin_id]
+            new_prices[i] = new_tick.price_usd
+            self._last_ts[i] = now_ms
+
             # Actualizar el tick más reciente
             self.latest_ticks[coin_id] = new_tick
-            
-            # Agregar al historial para cálculos estadísticos
-            self.price_history[coin_id].append(new_tick)
-            
-            # Notificar a los observadores sobre el nuevo tick
-            await self.notify_observers(tick=new_tick)
-    
+            new_ticks[i] = new_tick
+
+        # Comprobar el umbral de todas las monedas con una sola comparación
+        # vectorizada; solo los índices que lo superan construyen alertas
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (new_prices - self._last_price) / self._last_price * 100.0
+        hits = np.nonzero((self._last_price > 0.0) & (np.abs(pct) >= self.threshold))[0]
+
+        # Resumen de alertas del intervalo: una sola línea de log al final
+        # en lugar de una por alerta
+        alert_summaries = []
+
+        # Alertas por índice de moneda, para fusionarlas con su tick
+        alerts: Dict[int, PriceAlert] = {}
+
+        for i in hits:
+            coin_id = self.crypto_ids[i]
+            new_tick = self.latest_ticks[coin_id]
+            percent_change = float(pct[i])
+
+            # Crear alerta de cambio de precio
+            alert_type = (
+                PriceAlertType.PRICE_INCREASE if percent_change > 0
+                else PriceAlertType.PRICE_DECREASE
+            )
+
+            alerts[i] = PriceAlert(
+                coin_id=coin_id,
+                symbol=new_tick.symbol,
+                alert_type=alert_type,
+                old_price_usd=float(self._last_price[i]),
+                new_price_usd=new_tick.price_usd,
+                change_percent=percent_change,
+                timestamp_ms=now_ms,
+            )
+
+            alert_summaries.append({
+                "coin_id": coin_id,
+                "change_percent": round(percent_change, 2),
+                "old_price": float(self._last_price[i]),
+                "new_price": new_tick.price_usd,
+            })
+
+        if alert_summaries:
+            log.info(
+                "Alertas de cambio de precio",
+                count=len(alert_summaries),
+                alerts=alert_summaries,
+            )
+
+        # Un único fan-out por moneda (tick y, si la hay, su alerta juntos),
+        # y todas las monedas en paralelo: la latencia del intervalo pasa a
+        # ser el máximo de los observadores en lugar de la suma
+        if new_ticks:
+            await asyncio.gather(
+                *(
+                    self.notify_observers(tick=tick, alert=alerts.get(i))
+                    for i, tick in new_ticks.items()
+                )
+            )
+
+        # Consolidar los precios del intervalo como nuevo estado actual
+        self._last_price[:] = new_prices
+
+        # Escribir la columna del intervalo completo y avanzar la EMA de
+        # todas las monedas en una sola operación vectorizada
+        new = new_prices
+        self.price_history.append_column(new, now_ms)
+        self._ema_vec = np.where(
+            np.isnan(self._ema_vec),
+            new,
+            self._ema_alpha * new + (1.0 - self._ema_alpha) * self._ema_vec,
+        )
+
+        self._tick_count += 1
+
+        # Publicar los ticks en Redis para compartirlos entre workers
+        await self._cache_ticks()
+
+    async def _cache_ticks(self):
+        """
+        Guarda los últimos ticks en Redis con un TTL de 2 intervalos,
+        de forma que todos los workers compartan el mismo estado.
+        """
+        if not self.latest_ticks:
+            return
+
+        try:
+            redis = get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for coin_id, tick in self.latest_ticks.items():
+                    pipe.set(
+                        f"tick:{coin_id}",
+                        orjson.dumps(asdict(tick)),
+                        ex=2 * self.interval,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            # Redis es opcional: si no está disponible seguimos en memoria
+            err_logger.warning("No se pudieron cachear los ticks en Redis", error=str(e))
+
     async def _calculate_statistics(self):
         """
-        Calcula estadísticas para cada criptomoneda basándose en el historial de precios.
+        Calcula las estadísticas de todas las monedas en una sola pasada.
+
+        last_stats_batch procesa la matriz (K, count) completa: el coste por
+        intervalo es un único recorrido fusionado sobre K·count doubles en
+        lugar de K dispatches de Python independientes. La EMA es el vector
+        incremental que avanzó _fetch_and_process_prices.
         """
-        for coin_id, history in self.price_history.items():
-            if len(history) < 2:
-                continue  # No hay suficientes datos
-            
-            # Crear DataFrame para cálculos
-            df = pd.DataFrame([
-                {
-                    "price": tick.price_usd,
-                    "timestamp": tick.timestamp
-                } 
-                for tick in history
-            ])
-            
-            # Ordenar por timestamp
-            df = df.sort_values("timestamp")
-            
-            # Calcular estadísticas
+        count = self.price_history.count
+        if count < 2:
+            return  # No hay suficientes datos
+
+        tail = self.price_history.unwrapped()
+        means, smas, stds = last_stats_batch(tail, self._sma_window, self._vol_window)
+
+        # Timestamp compartido por todas las estadísticas del intervalo
+        now_ms = _now_ms()
+
+        for coin_id, i in self._coin_index.items():
+            tick = self.latest_ticks.get(coin_id)
+            if tick is None:
+                continue
+
             try:
-                # Solo calcular si hay suficientes datos
-                min_periods = min(20, len(df) - 1)
-                
-                # Calcular SMA (Media Móvil Simple)
-                if len(df) >= 20:
-                    df['sma_20'] = df['price'].rolling(window=20, min_periods=min_periods).mean()
-                
-                # Calcular EMA (Media Móvil Exponencial)
-                if len(df) >= 20:
-                    df['ema_20'] = df['price'].ewm(span=20, min_periods=min_periods).mean()
-                
-                # Calcular volatilidad (desviación estándar)
-                if len(df) >= 5:
-                    # Volatilidad como porcentaje del precio
-                    mean_price = df['price'].mean()
-                    std = df['price'].rolling(window=min(24, len(df)), min_periods=5).std()
-                    df['volatility_24h'] = (std / mean_price) * 100
-                
-                # Última fila para los valores más recientes
-                last_row = df.iloc[-1]
-                
-                # Crear objeto de estadísticas
+                sma_20 = float(smas[i]) if count >= self._sma_window else None
+                ema_20 = float(self._ema_vec[i]) if count >= self._sma_window else None
+
+                # Volatilidad: desviación estándar de la ventana de 24 como
+                # porcentaje del precio medio de todo el buffer
+                volatility_24h = (
+                    float(stds[i] / means[i] * 100) if count >= 5 else None
+                )
+
+                # Si nada se movió (p. ej. respuesta cacheada con el mismo
+                # precio), no reconstruir ni re-validar el modelo Pydantic
+                prev = self.latest_stats.get(coin_id)
+                if prev is not None and _stats_unchanged(
+                    prev, tick.price_usd, sma_20, ema_20, volatility_24h
+                ):
+                    continue
+
                 stats = StatisticsModel(
                     coin_id=coin_id,
-                    symbol=self.latest_ticks[coin_id].symbol,
-                    current_price=last_row['price'],
-                    sma_20=last_row.get('sma_20'),
-                    ema_20=last_row.get('ema_20'),
-                    volatility_24h=last_row.get('volatility_24h'),
-                    timestamp=datetime.now()
+                    symbol=tick.symbol,
+                    current_price=tick.price_usd,
+                    sma_20=sma_20,
+                    ema_20=ema_20,
+                    volatility_24h=volatility_24h,
+                    timestamp_ms=now_ms,
                 )
-                
+
                 # Actualizar estadísticas
                 self.latest_stats[coin_id] = stats
-                
+
             except Exception as e:
-                logger.error(f"Error al calcular estadísticas para {coin_id}", error=str(e))
+                err_logger.error(f"Error al calcular estadísticas para {coin_id}", error=str(e))
@@ -3,7 +3,6 @@ Demo del patrón Observer para monitoreo de precios de criptomonedas.
 """
 import asyncio
 import random
-from datetime import datetime
 
 from app.models.observer import Observer, Observable
 from app.models.crypto import CryptoTick, PriceAlert, PriceAlertType
@@ -39,21 +38,18 @@ class MonitorPreciosBitcoin(Observable):
             symbol=self.symbol,
             price_usd=nuevo_precio,
             price_change_24h_percent=cambio_porcentual,
-            timestamp=datetime.now()
         )
         self.ultimo_tick = tick
         self.precio_actual = nuevo_precio
-        
-        # Notificar a todos los observadores sobre el nuevo tick
-        await self.notify_observers(tick=tick)
-        
+
         # Si el cambio es significativo (>2%), generar una alerta
+        alerta = None
         if abs(cambio_porcentual) > 2.0:
             alert_type = (
-                PriceAlertType.PRICE_INCREASE if cambio_porcentual > 0 
+                PriceAlertType.PRICE_INCREASE if cambio_porcentual > 0
                 else PriceAlertType.PRICE_DECREASE
             )
-            
+
             alerta = PriceAlert(
                 coin_id=self.coin_id,
                 symbol=self.symbol,
@@ -62,9 +58,10 @@ class MonitorPreciosBitcoin(Observable):
                 new_price_usd=nuevo_precio,
                 change_percent=cambio_porcentual
             )
-            
-            # Notificar a los observadores sobre la alerta
-            await self.notify_observers(alert=alerta)
+
+        # Un único fan-out con el tick y, si la hay, su alerta: igual que el
+        # monitor de producción, en lugar de dos difusiones consecutivas
+        await self.notify_observers(tick=tick, alert=alerta)
 
 
 class ObservadorPrecio:
@@ -127,15 +124,18 @@ async def simular_cambios_precio():
         nuevo_precio = monitor.precio_actual * (1 + variacion/100)
         
         print(f"\n--- Actualización {i} ---")
-        await monitor.actualizar_precio(nuevo_precio)
-        
+        # Lanzar la actualización como tarea: la notificación en vuelo no
+        # bloquea al productor (la baja de observadores convive con ella)
+        actualizacion = asyncio.create_task(monitor.actualizar_precio(nuevo_precio))
+
         # Dar de baja al analista después de 5 actualizaciones
         if i == 5:
             print("\n[Sistema] El Analista ha dejado de observar los precios.")
             monitor.unregister_observer(analista)
-            
+
         # Pausa entre actualizaciones
         await asyncio.sleep(1)
+        await actualizacion
 
 
 if __name__ == "__main__":